@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Streaming Anomaly Detection
+Watches each vehicle's telemetry as it is decoded and turns trends into a
+few compact, deduplicated events (sagging battery, attitude oscillation,
+GPS satellite drops, altitude/climb spikes) so consumers such as the AI
+suggestions flow don't need the raw telemetry stream.
+
+Every detector is O(1) per sample: EWMA mean/variance, a CUSUM on the
+standardised residual, and a fixed rolling window with running sums.
+
+An anomaly is reported once when it starts ('active') and once when it
+has been quiet for a few samples ('cleared'); repeats in between only bump
+the count and value of the ongoing event, which active_events() returns.
+"""
+
+import math
+from collections import deque
+
+# field -> checks: 'min'/'critical_min' thresholds, 'drop' below the EWMA
+# baseline, 'zscore' spikes, 'cusum' (k, h) upward drift, 'oscillation'
+# rolling amplitude; 'warmup' samples gate the statistical checks, 'valid'
+# (low, high) drops sentinel values and 'min_std' floors the baseline spread
+# in field units so a flat signal (on the ground, hovering) can't make every
+# change look like a spike
+DEFAULT_RULES = {
+    'battery': {'label': 'Battery', 'unit': '%', 'min': 30, 'critical_min': 15, 'valid': (0, 100)},
+    'battery_drain_rate': {'label': 'Battery drain', 'unit': '%/min', 'cusum': (0.5, 6.0), 'warmup': 3},
+    'satellites': {'label': 'GPS satellites', 'unit': '', 'min': 6, 'drop': 3},
+    'roll': {'label': 'Roll', 'unit': 'rad', 'oscillation': 0.1},
+    'pitch': {'label': 'Pitch', 'unit': 'rad', 'oscillation': 0.1},
+    'altitude': {'label': 'Altitude', 'unit': 'm', 'zscore': 5.0, 'min_std': 2.0},
+    'climb_rate_smoothed': {'label': 'Climb rate', 'unit': 'm/s', 'zscore': 5.0, 'min_std': 0.5},
+}
+
+class FieldMonitor:
+    """Streaming statistics and detectors for one telemetry field"""
+
+    def __init__(self, rule, alpha=0.05, window=20, min_crossings=4):
+        self.rule = rule
+        self.alpha = alpha
+        self.min_crossings = min_crossings
+
+        # EWMA baseline
+        self.count = 0
+        self.mean = None
+        self.var = 0.0
+
+        # One-sided (upward) CUSUM on standardised residuals
+        self.cusum = 0.0
+
+        # Rolling window with running sums and mean-crossing count
+        self.window = deque(maxlen=window)
+        self.crossings = deque(maxlen=window)
+        self.window_sum = 0.0
+        self.window_sumsq = 0.0
+        self.crossing_count = 0
+        self.last_side = 0
+
+    def _std(self):
+        # Floor keeps near-constant signals from turning noise into huge z-scores
+        if 'min_std' in self.rule:
+            return max(math.sqrt(self.var), self.rule['min_std'])
+        return max(math.sqrt(self.var), 0.1 * abs(self.mean), 1e-6)
+
+    def _push_window(self, value):
+        if len(self.window) == self.window.maxlen:
+            old = self.window[0]
+            self.window_sum -= old
+            self.window_sumsq -= old * old
+            self.crossing_count -= self.crossings[0]
+        self.window.append(value)
+        self.window_sum += value
+        self.window_sumsq += value * value
+
+        side = (value > self.mean) - (value < self.mean)
+        crossed = 1 if side and self.last_side and side != self.last_side else 0
+        if side:
+            self.last_side = side
+        self.crossings.append(crossed)
+        self.crossing_count += crossed
+
+    def check(self, value):
+        """Feed one sample; return the (kind, severity, detail) conditions now true"""
+        rule = self.rule
+        conditions = []
+
+        if self.mean is None:
+            self.mean = value
+        baseline, std = self.mean, self._std()
+        z = (value - baseline) / std
+        warm = self.count >= rule.get('warmup', 20)
+
+        if 'min' in rule and value < rule['min']:
+            if value < rule.get('critical_min', -math.inf):
+                severity, limit = 'critical', rule['critical_min']
+            else:
+                severity, limit = 'warning', rule['min']
+            conditions.append(('low', severity, f"at {value:g}{rule['unit']}, below {limit}{rule['unit']}"))
+
+        if 'drop' in rule and warm and baseline - value >= rule['drop']:
+            conditions.append(('drop', 'warning', f"dropped from ~{baseline:.0f}"))
+
+        if 'zscore' in rule and warm and abs(z) > rule['zscore']:
+            conditions.append(('spike', 'warning', f"{z:+.1f} sigma from ~{baseline:.2f}{rule['unit']}"))
+
+        if 'cusum' in rule and warm:
+            k, h = rule['cusum']
+            self.cusum = max(0.0, self.cusum + z - k)
+            if self.cusum > h:
+                conditions.append(('drift', 'warning', f"trending up from ~{baseline:.2f}{rule['unit']}"))
+
+        if 'oscillation' in rule:
+            self._push_window(value)
+            n = len(self.window)
+            if n == self.window.maxlen:
+                window_mean = self.window_sum / n
+                amplitude = math.sqrt(max(self.window_sumsq / n - window_mean * window_mean, 0.0))
+                if amplitude > rule['oscillation'] and self.crossing_count >= self.min_crossings:
+                    conditions.append((
+                        'oscillation', 'warning',
+                        f"oscillating ±{amplitude:.2f}{rule['unit']}, {self.crossing_count} swings in {n} samples"
+                    ))
+
+        # Update the baseline after testing so a spike is judged against history
+        delta = value - self.mean
+        self.mean += self.alpha * delta
+        self.var = (1 - self.alpha) * (self.var + self.alpha * delta * delta)
+        self.count += 1
+
+        return conditions
+
+class AnomalyDetector:
+    """Per-vehicle detector: runs field monitors and reports each anomaly episode once"""
+
+    def __init__(self, sysid, rules=DEFAULT_RULES, clear_after=10):
+        self.sysid = sysid
+        self.rules = rules
+        self.clear_after = clear_after  # quiet samples before an anomaly is cleared
+        self.monitors = {}
+        self.active = {}  # (field, kind) -> event
+        self.quiet = {}  # (field, kind) -> consecutive quiet samples
+
+    def update(self, updates, now):
+        """Fold in one batch of telemetry; return newly started or cleared events"""
+        events = []
+
+        for field, rule in self.rules.items():
+            value = updates.get(field)
+            if value is None or isinstance(value, float) and math.isnan(value):
+                continue
+            if 'valid' in rule and not rule['valid'][0] <= value <= rule['valid'][1]:
+                continue  # e.g. battery -1: "not estimated"
+
+            monitor = self.monitors.get(field)
+            if monitor is None:
+                monitor = self.monitors[field] = FieldMonitor(rule)
+
+            seen = set()
+            for kind, severity, detail in monitor.check(float(value)):
+                key = (field, kind)
+                seen.add(key)
+                self.quiet[key] = 0
+
+                event = self.active.get(key)
+                if event is None:
+                    event = self.active[key] = {
+                        'sysid': self.sysid,
+                        'field': field,
+                        'kind': kind,
+                        'severity': severity,
+                        'state': 'active',
+                        'message': f"{rule['label']} {detail}",
+                        'value': value,
+                        'since': int(now * 1000),
+                        'count': 1,
+                    }
+                    events.append(dict(event))
+                else:
+                    event['count'] += 1
+                    event['value'] = value
+                    if severity == 'critical' and event['severity'] != 'critical':
+                        # Escalations are worth a new event; everything else is a repeat
+                        event['severity'] = severity
+                        event['message'] = f"{rule['label']} {detail}"
+                        events.append(dict(event))
+
+            for key in [key for key in self.active if key[0] == field and key not in seen]:
+                self.quiet[key] = self.quiet.get(key, 0) + 1
+                if self.quiet[key] >= self.clear_after:
+                    event = self.active.pop(key)
+                    del self.quiet[key]
+                    event.update({'state': 'cleared', 'value': value, 'cleared_at': int(now * 1000)})
+                    events.append(event)
+
+        return events
+
+    def active_events(self):
+        """Snapshot of anomalies that are currently ongoing"""
+        return [dict(event) for event in self.active.values()]
@@ -4,11 +4,23 @@ Simple ArduPilot-compatible MAVLink Simulator
 Generates realistic drone telemetry without needing the full SITL installation
 """
 
+import argparse
 import socket
 import struct
 import time
 import math
-from pymavlink.dialects.v20 import ardupilotmega as mavlink_module
+from link_impairment import add_impairment_arguments, impairment_from_args
+from mavlink_dialect import load_dialect_module
+
+# MAVLink dialect module, loaded on first use (see load_mavlink_module)
+mavlink_module = None
+
+def load_mavlink_module(dialect=None):
+    """Load the MAVLink dialect used to build messages ('trimmed' for the cached minimal one)"""
+    global mavlink_module
+    if mavlink_module is None:
+        mavlink_module = load_dialect_module(dialect)
+    return mavlink_module
 
 def create_mavlink_message(msgid, **kwargs):
     """Create a MAVLink message"""
@@ -17,12 +29,24 @@ def create_mavlink_message(msgid, **kwargs):
         setattr(msg, key, value)
     return msg
 
-def pack_mavlink_message(msg):
+def pack_mavlink_message(msg, mav=None):
     """Pack MAVLink message to bytes"""
-    return msg.pack(mavlink_module.MAVLink(None, 0, 0))
+    if mav is None:
+        return msg.pack(mavlink_module.MAVLink(None, 0, 0))
+    
+    # MAVLink.send() normally advances the sequence; we pack by hand
+    data = msg.pack(mav)
+    mav.seq = (mav.seq + 1) % 256
+    return data
 
 class DroneSimulator:
-    def __init__(self, listen_port=14550):
+    def __init__(self, listen_port=14550, dialect=None, impairment=None, system_id=1):
+        load_mavlink_module(dialect)
+        # One MAVLink instance so packets carry our system id and a running
+        # sequence number the receiver can use to count loss
+        self.mav = mavlink_module.MAVLink(None, system_id, 1)
+        self.impairment = impairment  # LinkImpairment, or None for a perfect link
+        self.send_errors = 0
         self.listen_port = listen_port
         self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
@@ -57,7 +81,7 @@ class DroneSimulator:
             system_status=3,  # MAV_STATE_ACTIVE
             mavlink_version=3
         )
-        return pack_mavlink_message(msg)
+        return pack_mavlink_message(msg, self.mav)
     
     def generate_system_time(self):
         """Generate SYSTEM_TIME message (msg_id=1)"""
@@ -65,7 +89,7 @@ class DroneSimulator:
             time_unix_usec=int(time.time() * 1e6),
             time_boot_ms=self.time_boot_ms
         )
-        return pack_mavlink_message(msg)
+        return pack_mavlink_message(msg, self.mav)
     
     def generate_attitude(self):
         """Generate ATTITUDE message (msg_id=30)"""
@@ -78,7 +102,7 @@ class DroneSimulator:
             pitchspeed=0.01,
             yawspeed=0.02
         )
-        return pack_mavlink_message(msg)
+        return pack_mavlink_message(msg, self.mav)
     
     def generate_global_position(self):
         """Generate GLOBAL_POSITION_INT message (msg_id=33)"""
@@ -93,7 +117,7 @@ class DroneSimulator:
             vz=int(self.vz * 100),
             hdg=int(math.degrees(self.yaw) * 100)
         )
-        return pack_mavlink_message(msg)
+        return pack_mavlink_message(msg, self.mav)
     
     def generate_battery_status(self):
         """Generate BATTERY_STATUS message (msg_id=147)"""
@@ -108,7 +132,7 @@ class DroneSimulator:
             energy_consumed=-1,
             battery_remaining=int(self.battery_remaining)
         )
-        return pack_mavlink_message(msg)
+        return pack_mavlink_message(msg, self.mav)
     
     def simulate_flight(self):
         """Simulate drone flight behavior"""
@@ -150,6 +174,8 @@ class DroneSimulator:
         """Main simulator loop"""
         print(f"🚁 ArduPilot Simulator listening on UDP 127.0.0.1:{self.listen_port}")
         print("   Simulating realistic drone telemetry...")
+        if self.impairment is not None:
+            print(f"   Impaired link enabled (seed {self.impairment.seed})")
         print("   Press Ctrl+C to stop\n")
         
         start_time = time.time()
@@ -180,22 +206,72 @@ class DroneSimulator:
                 ]
                 
                 for msg in messages:
-                    try:
-                        # Send to bridge listening on 14550
-                        self.broadcast_socket.sendto(msg, ('127.0.0.1', self.listen_port))
-                    except:
-                        pass
+                    # Send to bridge listening on 14550
+                    self.send(msg, ('127.0.0.1', self.listen_port))
                 
                 # Print status
                 if int(elapsed) % 5 == 0 and self.time_boot_ms % 5000 < 100:
                     status = "ARMED" if self.is_armed else "DISARMED"
                     print(f"[{elapsed:.1f}s] {status} | Alt: {self.altitude:.1f}m | Bat: {self.battery_remaining:.0f}% | State: {self.flight_state}")
+                    if self.impairment is not None:
+                        print(f"   Link: {self.impairment.summary()}")
                 
-                time.sleep(0.1)  # 10 Hz update rate
+                self.wait(0.1)  # 10 Hz update rate
         
         except KeyboardInterrupt:
             print("\n✓ Simulator stopped")
+            if self.impairment is not None:
+                print(f"   Link: {self.impairment.summary()}")
+    
+    def send(self, data, addr):
+        """Send one packet, through the impairment layer if configured"""
+        if self.impairment is not None:
+            self.impairment.send(data, addr)
+            self.impairment.flush(self.broadcast_socket)
+            return
+        
+        try:
+            self.broadcast_socket.sendto(data, addr)
+        except OSError as e:
+            self.send_errors += 1
+            if self.send_errors == 1 or self.send_errors % 100 == 0:
+                print(f"Send to {addr[0]}:{addr[1]} failed ({self.send_errors} so far): {e}")
+    
+    def wait(self, seconds):
+        """Sleep, releasing delayed packets on time while the link is impaired"""
+        if self.impairment is None:
+            time.sleep(seconds)
+            return
+        
+        deadline = time.monotonic() + seconds
+        while True:
+            self.impairment.flush(self.broadcast_socket)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            time.sleep(min(remaining, 0.002))
 
 if __name__ == '__main__':
-    sim = DroneSimulator()
+    parser = argparse.ArgumentParser(description='ArduPilot-compatible MAVLink simulator')
+    parser.add_argument(
+        '--port',
+        type=int,
+        default=14550,
+        help='UDP port to send telemetry to (default: 14550)'
+    )
+    parser.add_argument(
+        '--dialect',
+        default=None,
+        help="MAVLink dialect: 'trimmed' for the cached minimal dialect (default: ardupilotmega)"
+    )
+    parser.add_argument(
+        '--sysid',
+        type=int,
+        default=1,
+        help='MAVLink system id; give each simulator in a fleet its own (default: 1)'
+    )
+    add_impairment_arguments(parser)
+    args = parser.parse_args()
+    
+    sim = DroneSimulator(args.port, args.dialect, impairment_from_args(args), args.sysid)
     sim.run()
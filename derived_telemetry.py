@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Derived Telemetry Stage
+Keeps running, O(1)-per-update estimates for each vehicle so dashboard
+clients don't recompute them from raw values on every poll:
+
+    distance_to_home, bearing_to_home            metres / degrees
+    distance_to_waypoint, bearing_to_waypoint    metres / degrees
+    eta_to_waypoint                              seconds at smoothed groundspeed
+    climb_rate_smoothed, groundspeed_smoothed    EWMA, m/s
+    battery_drain_rate                           percent per minute
+    battery_time_remaining                       seconds until 0 %
+    distance_flown                               cumulative metres
+
+Home comes from HOME_POSITION when the vehicle sends it, otherwise from the
+first position fix. The active waypoint comes from POSITION_TARGET_GLOBAL_INT.
+"""
+
+import math
+
+EARTH_RADIUS = 6371008.8  # metres (mean)
+
+def haversine_distance(lat1, lon1, lat2, lon2):
+    """Great-circle distance in metres between two lat/lon points in degrees"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS * math.asin(min(1.0, math.sqrt(a)))
+
+def initial_bearing(lat1, lon1, lat2, lon2):
+    """Initial bearing in degrees (0-360, clockwise from north) from point 1 to point 2"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dlambda = math.radians(lon2 - lon1)
+    x = math.sin(dlambda) * math.cos(phi2)
+    y = math.cos(phi1) * math.sin(phi2) - math.sin(phi1) * math.cos(phi2) * math.cos(dlambda)
+    return (math.degrees(math.atan2(x, y)) + 360) % 360
+
+class DerivedTelemetry:
+    """Per-vehicle derived values, updated incrementally from decoded telemetry"""
+
+    def __init__(self, smoothing_tau=2.0, battery_tau=60.0, min_step=0.5, min_eta_speed=0.5):
+        self.smoothing_tau = smoothing_tau  # EWMA time constant, seconds
+        self.battery_tau = battery_tau  # drain-rate EWMA time constant, seconds
+        self.min_step = min_step  # metres; smaller moves are treated as GPS jitter
+        self.min_eta_speed = min_eta_speed  # m/s; below this no ETA is given
+
+        self.position = None
+        self.home = None
+        self.waypoint = None
+        self.waypoint_distance = None
+
+        self.climb_rate = None
+        self.groundspeed = None
+        self.last_climb_time = None
+        self.last_speed_time = None
+
+        self.battery_level = None
+        self.battery_change_time = None
+        self.battery_drain_rate = None  # percent per second
+
+        self.odometer_anchor = None
+        self.distance_flown = 0.0
+
+    def _smooth(self, previous, value, last_time, now):
+        """Time-aware EWMA so irregular message rates smooth the same way"""
+        if previous is None or last_time is None:
+            return value
+        alpha = 1 - math.exp(-max(now - last_time, 0.0) / self.smoothing_tau)
+        return previous + alpha * (value - previous)
+
+    def update(self, updates, now):
+        """Fold one batch of decoded telemetry in; return the derived fields it changed"""
+        derived = {}
+        moved = False
+
+        if 'home_latitude' in updates:
+            self.home = (updates['home_latitude'], updates['home_longitude'])
+            moved = True
+
+        if 'target_latitude' in updates and (updates['target_latitude'] or updates['target_longitude']):
+            self.waypoint = (updates['target_latitude'], updates['target_longitude'])
+            moved = True
+
+        if 'latitude' in updates and (updates['latitude'] or updates['longitude']):
+            self.position = (updates['latitude'], updates['longitude'])
+            if self.home is None:
+                self.home = self.position
+            self._advance_odometer()
+            derived['distance_flown'] = self.distance_flown
+            moved = True
+
+        if moved and self.position is not None:
+            derived.update(self._navigation())
+
+        climb = -updates['vz'] if 'vz' in updates else updates.get('climb_rate')
+        if climb is not None:
+            self.climb_rate = self._smooth(self.climb_rate, climb, self.last_climb_time, now)
+            self.last_climb_time = now
+            derived['climb_rate_smoothed'] = self.climb_rate
+
+        speed = updates['speed'] if 'speed' in updates else updates.get('groundspeed')
+        if speed is not None:
+            self.groundspeed = self._smooth(self.groundspeed, speed, self.last_speed_time, now)
+            self.last_speed_time = now
+            derived['groundspeed_smoothed'] = self.groundspeed
+            if self.waypoint_distance is not None:
+                derived['eta_to_waypoint'] = self._eta(self.waypoint_distance)
+
+        battery = updates.get('battery')
+        if battery is not None and battery >= 0:
+            derived.update(self._update_battery(battery, now))
+
+        return derived
+
+    def _advance_odometer(self):
+        if self.odometer_anchor is None:
+            self.odometer_anchor = self.position
+            return
+        step = haversine_distance(*self.odometer_anchor, *self.position)
+        if step >= self.min_step:
+            self.distance_flown += step
+            self.odometer_anchor = self.position
+
+    def _navigation(self):
+        derived = {}
+        if self.home is not None:
+            derived['distance_to_home'] = haversine_distance(*self.position, *self.home)
+            derived['bearing_to_home'] = initial_bearing(*self.position, *self.home)
+        if self.waypoint is not None:
+            self.waypoint_distance = haversine_distance(*self.position, *self.waypoint)
+            derived['distance_to_waypoint'] = self.waypoint_distance
+            derived['bearing_to_waypoint'] = initial_bearing(*self.position, *self.waypoint)
+            derived['eta_to_waypoint'] = self._eta(self.waypoint_distance)
+        return derived
+
+    def _eta(self, distance):
+        if self.groundspeed is None or self.groundspeed < self.min_eta_speed:
+            return None
+        return distance / self.groundspeed
+
+    def _update_battery(self, level, now):
+        """Battery percentages move in whole steps, so rate is measured between steps"""
+        if self.battery_level is None or level > self.battery_level:
+            # First reading, or a battery swap/charge: restart the estimate
+            self.battery_level = level
+            self.battery_change_time = now
+            self.battery_drain_rate = None
+            return {'battery_drain_rate': None, 'battery_time_remaining': None}
+
+        if level == self.battery_level:
+            if self.battery_drain_rate is None:
+                return {}
+            # Between steps the remaining time keeps counting down
+            elapsed = now - self.battery_change_time
+            remaining = max(level / self.battery_drain_rate - elapsed, 0.0)
+            return {'battery_time_remaining': remaining}
+
+        elapsed = now - self.battery_change_time
+        if elapsed > 0:
+            rate = (self.battery_level - level) / elapsed
+            if self.battery_drain_rate is None:
+                self.battery_drain_rate = rate
+            else:
+                alpha = 1 - math.exp(-elapsed / self.battery_tau)
+                self.battery_drain_rate += alpha * (rate - self.battery_drain_rate)
+        self.battery_level = level
+        self.battery_change_time = now
+
+        if not self.battery_drain_rate:
+            return {}
+        return {
+            'battery_drain_rate': self.battery_drain_rate * 60,
+            'battery_time_remaining': level / self.battery_drain_rate,
+        }
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Link Impairment Layer
+Sits between a simulator and its UDP socket and makes a perfect localhost
+link behave like a radio link: random and bursty loss, delay and jitter,
+reordering, duplication, byte corruption and a bandwidth cap.
+
+Every random decision comes from one seeded generator and is drawn in a
+fixed order per packet, so a scenario (which packets are lost, corrupted,
+duplicated or reordered) replays exactly for the same seed.
+
+Bursty loss uses a Gilbert-Elliott model: each packet may start a burst
+with probability burst_rate, and bursts last burst_length packets on
+average, all of them lost.
+
+Usage:
+    python3 ardupilot_sim.py --loss 0.02 --burst-rate 0.01 --burst-length 8 \\
+        --delay 0.08 --jitter 0.03 --bandwidth 5000 --seed 42
+"""
+
+import heapq
+import random
+import time
+
+class LinkImpairment:
+    """Schedules outgoing datagrams through a configurable impaired link"""
+
+    def __init__(self, loss=0.0, burst_rate=0.0, burst_length=5.0, delay=0.0, jitter=0.0,
+                 reorder=0.0, duplicate=0.0, corrupt=0.0, bandwidth=None, queue_limit=1000,
+                 seed=None):
+        self.loss = loss  # independent loss probability per packet
+        self.burst_rate = burst_rate  # probability a packet starts a loss burst
+        self.burst_length = max(burst_length, 1.0)  # mean packets per burst
+        self.delay = delay  # seconds
+        self.jitter = jitter  # seconds, uniform +/- around delay
+        self.reorder = reorder  # probability a packet is overtaken by the next one
+        self.duplicate = duplicate  # probability a packet is delivered twice
+        self.corrupt = corrupt  # probability one byte of a packet is flipped
+        self.bandwidth = bandwidth  # bytes per second, None for unlimited
+        self.queue_limit = queue_limit  # packets in flight before tail drop
+
+        self.seed = seed
+        self.random = random.Random(seed)
+        self.in_burst = False
+        self.held = None  # packet waiting to be overtaken
+        self.queue = []  # heap of (deliver_at, order, data, addr)
+        self.order = 0
+        self.link_free_at = 0.0
+
+        self.stats = {
+            'sent': 0,
+            'delivered': 0,
+            'lost': 0,
+            'burst_lost': 0,
+            'duplicated': 0,
+            'corrupted': 0,
+            'reordered': 0,
+            'overflowed': 0,
+            'send_errors': 0,
+        }
+
+    @property
+    def enabled(self):
+        return any((
+            self.loss, self.burst_rate, self.delay, self.jitter, self.reorder,
+            self.duplicate, self.corrupt, self.bandwidth
+        ))
+
+    def _lost(self):
+        """Advance the loss model by one packet"""
+        if self.in_burst:
+            if self.random.random() < 1.0 / self.burst_length:
+                self.in_burst = False
+        elif self.random.random() < self.burst_rate:
+            self.in_burst = True
+        if self.in_burst:
+            self.stats['burst_lost'] += 1
+            return True
+        return self.random.random() < self.loss
+
+    def _schedule(self, data, addr, now):
+        if len(self.queue) >= self.queue_limit:
+            self.stats['overflowed'] += 1
+            return
+
+        deliver_at = now + self.delay
+        if self.jitter:
+            deliver_at += self.random.uniform(-self.jitter, self.jitter)
+        deliver_at = max(deliver_at, now)
+
+        if self.bandwidth:
+            # Serialise onto the link: a packet can't finish before the previous one
+            self.link_free_at = max(self.link_free_at, deliver_at) + len(data) / self.bandwidth
+            deliver_at = self.link_free_at
+
+        heapq.heappush(self.queue, (deliver_at, self.order, data, addr))
+        self.order += 1
+
+    def send(self, data, addr, now=None):
+        """Pass one datagram through the impairment model"""
+        now = time.monotonic() if now is None else now
+        self.stats['sent'] += 1
+
+        # Draw every decision up front so the sequence depends only on the seed
+        lost = self._lost()
+        duplicated = self.random.random() < self.duplicate
+        corrupted = self.random.random() < self.corrupt
+        reordered = self.random.random() < self.reorder
+        position = self.random.randrange(len(data)) if data else 0
+        bit = 1 << self.random.randrange(8)
+
+        if lost:
+            self.stats['lost'] += 1
+            return
+
+        if corrupted and data:
+            data = bytearray(data)
+            data[position] ^= bit
+            data = bytes(data)
+            self.stats['corrupted'] += 1
+
+        copies = [data, data] if duplicated else [data]
+        if duplicated:
+            self.stats['duplicated'] += 1
+
+        if reordered and self.held is None:
+            # Hold this packet back until the next one has been queued
+            self.held = (copies, addr)
+            self.stats['reordered'] += 1
+            return
+
+        for copy in copies:
+            self._schedule(copy, addr, now)
+        if self.held is not None:
+            held_copies, held_addr = self.held
+            self.held = None
+            for copy in held_copies:
+                self._schedule(copy, held_addr, now)
+
+    def flush(self, sock, now=None):
+        """Send every datagram whose delivery time has come; return how many went out"""
+        now = time.monotonic() if now is None else now
+        delivered = 0
+        while self.queue and self.queue[0][0] <= now:
+            _, _, data, addr = heapq.heappop(self.queue)
+            try:
+                sock.sendto(data, addr)
+                delivered += 1
+            except OSError as e:
+                self.stats['send_errors'] += 1
+                errors = self.stats['send_errors']
+                if errors == 1 or errors % 100 == 0:
+                    print(f"Send to {addr[0]}:{addr[1]} failed ({errors} so far): {e}")
+        self.stats['delivered'] += delivered
+        return delivered
+
+    def summary(self):
+        """One-line description of what the link has done so far"""
+        sent = self.stats['sent'] or 1
+        return (
+            f"sent {self.stats['sent']}, delivered {self.stats['delivered']}, "
+            f"lost {self.stats['lost']} ({100 * self.stats['lost'] / sent:.1f}%, "
+            f"{self.stats['burst_lost']} in bursts), dup {self.stats['duplicated']}, "
+            f"corrupt {self.stats['corrupted']}, reorder {self.stats['reordered']}, "
+            f"overflow {self.stats['overflowed']}, queued {len(self.queue)}, "
+            f"send errors {self.stats['send_errors']}"
+        )
+
+def add_impairment_arguments(parser):
+    """Register the impairment options on a simulator's argument parser"""
+    group = parser.add_argument_group('link impairment')
+    group.add_argument('--loss', type=float, default=0.0, help='Random packet loss probability (default: 0)')
+    group.add_argument('--burst-rate', type=float, default=0.0, help='Probability a packet starts a loss burst (default: 0)')
+    group.add_argument('--burst-length', type=float, default=5.0, help='Mean packets lost per burst (default: 5)')
+    group.add_argument('--delay', type=float, default=0.0, help='One-way delay in seconds (default: 0)')
+    group.add_argument('--jitter', type=float, default=0.0, help='Uniform delay jitter in seconds (default: 0)')
+    group.add_argument('--reorder', type=float, default=0.0, help='Probability a packet is overtaken by the next (default: 0)')
+    group.add_argument('--duplicate', type=float, default=0.0, help='Packet duplication probability (default: 0)')
+    group.add_argument('--corrupt', type=float, default=0.0, help='Probability one byte of a packet is flipped (default: 0)')
+    group.add_argument('--bandwidth', type=float, default=None, help='Link capacity in bytes/s (default: unlimited)')
+    group.add_argument('--seed', type=int, default=None, help='Random seed for a reproducible scenario')
+    return group
+
+def impairment_from_args(args):
+    """Build a LinkImpairment from parsed arguments, or None for a perfect link"""
+    impairment = LinkImpairment(
+        loss=args.loss,
+        burst_rate=args.burst_rate,
+        burst_length=args.burst_length,
+        delay=args.delay,
+        jitter=args.jitter,
+        reorder=args.reorder,
+        duplicate=args.duplicate,
+        corrupt=args.corrupt,
+        bandwidth=args.bandwidth,
+        seed=args.seed,
+    )
+    return impairment if impairment.enabled else None
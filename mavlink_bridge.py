@@ -6,32 +6,88 @@ Connects to drone simulator (PX4 SITL or ArduPilot) and relays messages to the d
 Usage:
     python3 mavlink_bridge.py --host 127.0.0.1 --port 14540
 
+Fleet mode (one UDP endpoint per vehicle, decoding sharded over 4 processes):
+    python3 mavlink_bridge.py --sim-port 14540 14541 14542 14543 --workers 4
+Vehicles are keyed by system id, so each needs its own (ardupilot_sim.py --sysid N).
+
+Publish latest telemetry to shared memory for local readers (see telemetry_shm.py):
+    python3 mavlink_bridge.py --shm vyom_telemetry
+
+Fast startup with a trimmed, cached dialect (see mavlink_dialect.py):
+    python3 mavlink_bridge.py --dialect trimmed
+
+Anomaly events (for the AI suggestions flow) are served at /anomalies.
+
+Routing mode: forward raw frames to extra GCS/logger endpoints and their
+commands back to the vehicles (see mavlink_router.py). Only the messages
+the dashboard uses are decoded; everything else is forwarded untouched:
+    python3 mavlink_bridge.py --route udp:127.0.0.1:14560 --route tcp:127.0.0.1:5760
+With more than one worker each worker routes its own shard over its own
+connection, so only tcp: routes are accepted.
+
 Requirements:
     pip install pymavlink
 """
 
 import argparse
 import json
+import multiprocessing
+import os
+import select
 import socket
 import threading
 import time
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from collections import deque
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 from urllib.parse import urlparse
-from pymavlink import mavutil
 from datetime import datetime
+from anomaly_detector import AnomalyDetector
+from derived_telemetry import DerivedTelemetry
+from mavlink_dialect import load_mavutil
+from mavlink_router import MAVLINK_STX_V1, MAVLINK_STX_V2, MAVLinkRouter, parse_route
+from telemetry_shm import TelemetryTableWriter
 
 # Global state
 current_telemetry = {}
+vehicle_telemetry = {}  # sysid -> telemetry
 mavlink_messages = []
+state_lock = threading.Lock()
+derived_telemetry = {}  # sysid -> DerivedTelemetry, kept by whichever process decodes
+anomaly_detectors = {}  # sysid -> AnomalyDetector, kept by whichever process decodes
+link_sequences = {}  # (sysid, compid) -> [last seq, bitmap of seqs seen behind it], kept by whichever process decodes
+link_counts = {}  # sysid -> [received, expected] over all its components
+anomaly_events = deque(maxlen=100)  # started/cleared events, oldest first
+active_anomalies = {}  # (sysid, field, kind) -> ongoing event
+vehicle_endpoints = {}  # sysid -> endpoints it has been seen on
 is_connected = False
 connection = None
+telemetry_table = None
+router = None
+
+# Sequence numbers remembered per component to tell late packets from duplicates
+SEQ_WINDOW = 128
+SEQ_WINDOW_MASK = (1 << SEQ_WINDOW) - 1
+
+# POSITION_TARGET_TYPEMASK X_IGNORE | Y_IGNORE: the target carries no lat/lon
+POSITION_TARGET_IGNORE_LAT_LON = 0x3
+
+# Messages decode_telemetry uses; in routing mode all others are only forwarded
+DECODED_MESSAGES = (
+    'GLOBAL_POSITION_INT',
+    'ATTITUDE',
+    'HEARTBEAT',
+    'BATTERY_STATUS',
+    'GPS_RAW_INT',
+    'VFR_HUD',
+    'SYSTEM_TIME',
+    'HOME_POSITION',
+    'POSITION_TARGET_GLOBAL_INT',
+)
 
 class MAVLinkBridgeHandler(BaseHTTPRequestHandler):
     """HTTP handler for telemetry requests"""
     
     def do_GET(self):
-        global current_telemetry, mavlink_messages, is_connected
-        
         parsed_path = urlparse(self.path)
         
         # Enable CORS
@@ -40,15 +96,28 @@ class MAVLinkBridgeHandler(BaseHTTPRequestHandler):
         self.send_header('Access-Control-Allow-Origin', '*')
         self.end_headers()
         
-        response = {
-            'success': True,
-            'timestamp': int(time.time() * 1000),
-            'is_connected': is_connected,
-            'mavlink_messages': mavlink_messages[-10:],  # Last 10 messages
-            'telemetry': current_telemetry,
-        }
+        with state_lock:
+            if parsed_path.path == '/anomalies':
+                # Compact summary for the AI suggestions flow
+                response = {
+                    'success': True,
+                    'timestamp': int(time.time() * 1000),
+                    'active': list(active_anomalies.values()),
+                    'recent': list(anomaly_events)[-20:],
+                }
+            else:
+                response = {
+                    'success': True,
+                    'timestamp': int(time.time() * 1000),
+                    'is_connected': is_connected,
+                    'mavlink_messages': mavlink_messages[-10:],  # Last 10 messages
+                    'telemetry': current_telemetry,
+                    'vehicles': vehicle_telemetry,
+                    'anomalies': list(active_anomalies.values()),
+                }
+            body = json.dumps(response).encode()
         
-        self.wfile.write(json.dumps(response).encode())
+        self.wfile.write(body)
     
     def do_OPTIONS(self):
         """Handle CORS preflight requests"""
@@ -62,9 +131,225 @@ class MAVLinkBridgeHandler(BaseHTTPRequestHandler):
         """Suppress default logging"""
         pass
 
+def decode_telemetry(msg):
+    """Map a decoded MAVLink message onto telemetry fields (None if unused)"""
+    msg_type = msg.get_type()
+    
+    # Parse common messages
+    if msg_type == 'GLOBAL_POSITION_INT':
+        return {
+            'latitude': msg.lat / 1e7,
+            'longitude': msg.lon / 1e7,
+            'altitude': msg.alt / 1000,  # mm to m
+            'relative_alt': msg.relative_alt / 1000,
+            'vx': msg.vx / 100,  # cm/s to m/s
+            'vy': msg.vy / 100,
+            'vz': msg.vz / 100,
+            'hdg': msg.hdg / 100,  # deg*100 to deg
+            # Calculate speed
+            'speed': (msg.vx**2 + msg.vy**2)**0.5 / 100,
+        }
+    
+    elif msg_type == 'ATTITUDE':
+        return {
+            'roll': msg.roll,
+            'pitch': msg.pitch,
+            'yaw': msg.yaw,
+        }
+    
+    elif msg_type == 'HEARTBEAT':
+        return {
+            'heartbeat': msg.system_status != 0,
+            'flight_mode': msg.custom_mode,
+            'autopilot': msg.autopilot,
+        }
+    
+    elif msg_type == 'BATTERY_STATUS':
+        return {'battery': msg.battery_remaining}
+    
+    elif msg_type == 'GPS_RAW_INT':
+        return {
+            'satellites': msg.satellites_visible,
+            'fix_type': msg.fix_type,
+        }
+    
+    elif msg_type == 'VFR_HUD':
+        return {
+            'airspeed': msg.airspeed,
+            'groundspeed': msg.groundspeed,
+            'heading': msg.heading,
+            'throttle': msg.throttle,
+            'altitude': msg.alt,
+            'climb_rate': msg.climb,
+        }
+    
+    elif msg_type == 'SYSTEM_STATUS':
+        return {
+            'battery': msg.battery_remaining,
+            'load': msg.load,
+        }
+    
+    elif msg_type == 'SYSTEM_TIME':
+        # One-way latency; only meaningful when vehicle and bridge share a clock (SITL)
+        return {'link_latency_ms': time.time() * 1000 - msg.time_unix_usec / 1000}
+    
+    elif msg_type == 'HOME_POSITION':
+        return {
+            'home_latitude': msg.latitude / 1e7,
+            'home_longitude': msg.longitude / 1e7,
+        }
+    
+    elif msg_type == 'POSITION_TARGET_GLOBAL_INT':
+        if msg.type_mask & POSITION_TARGET_IGNORE_LAT_LON:
+            return None  # Velocity/acceleration-only target; there is no waypoint
+        return {
+            'target_latitude': msg.lat_int / 1e7,
+            'target_longitude': msg.lon_int / 1e7,
+        }
+    
+    return None
+
+def track_link_quality(sysid, compid, seq):
+    """Count received and lost packets per vehicle from MAVLink sequence numbers"""
+    # Each component (autopilot, gimbal, camera...) numbers its own packets
+    key = (sysid, compid)
+    counts = link_counts.setdefault(sysid, [0, 0])
+    state = link_sequences.get(key)
+    if state is None:
+        link_sequences[key] = [seq, 1]
+        counts[0] += 1
+        counts[1] += 1
+    else:
+        last, seen = state
+        gap = (seq - last) % 256
+        if 0 < gap < 128:
+            # Forward jump: the sequence expects gap packets to have been sent
+            state[0] = seq
+            state[1] = (seen << gap | 1) & SEQ_WINDOW_MASK
+            counts[0] += 1
+            counts[1] += gap
+        else:
+            # Behind the newest packet: a late (reordered) one fills its gap,
+            # one already seen is a duplicate and must not hide real loss
+            behind = (last - seq) % 256
+            if behind < SEQ_WINDOW and not seen >> behind & 1:
+                state[1] = seen | 1 << behind
+                counts[0] += 1
+    
+    received, expected = counts
+    return {
+        'link_received': received,
+        'link_lost': expected - received,
+        'link_loss_pct': 100 * (expected - received) / expected,
+    }
+
+def message_header(msg):
+    """(sysid, compid, seq) of a received message, or None if it has no usable header"""
+    if not msg.get_type().startswith('UNKNOWN_'):
+        return msg.get_srcSystem(), msg.get_srcComponent(), msg.get_seq()
+    
+    # Messages outside the dialect report 0 for all three; read the raw header
+    # the same way mavlink_router.split_frames does
+    buf = msg.get_msgbuf()
+    if buf is None or len(buf) < 7:
+        return None
+    if buf[0] == MAVLINK_STX_V2:
+        return buf[5], buf[6], buf[4]
+    if buf[0] == MAVLINK_STX_V1:
+        return buf[3], buf[4], buf[2]
+    return None
+
+def message_log_entries(msg):
+    """Message log entries for msg; none for UNKNOWN_* messages outside the dialect"""
+    if msg.get_type().startswith('UNKNOWN_'):
+        # Their raw payload is a bytearray, which the JSON response can't carry
+        return []
+    return [msg.to_dict()]
+
+def decoded_message_ids(mavutil):
+    """MAVLink ids of DECODED_MESSAGES in the loaded dialect"""
+    return {getattr(mavutil.mavlink, f'MAVLINK_MSG_ID_{name}') for name in DECODED_MESSAGES}
+
+def route_frames(link, router, data, decoded_ids):
+    """Forward raw bytes read from a vehicle; yield (sysid, compid, seq, msg) per frame
+
+    msg is only decoded for DECODED_MESSAGES and is None for everything else.
+    """
+    for start, end, sysid, compid, seq, msgid, _, _ in router.from_vehicle(link, data):
+        msg = None
+        if msgid in decoded_ids:
+            try:
+                msg = link.mav.decode(bytearray(data[start:end]))
+            except Exception:
+                # Bad CRC; skipped like BAD_DATA so its sequence gap counts as loss
+                continue
+        yield sysid, compid, seq, msg
+
+def derive_telemetry(sysid, updates, now=None):
+    """Pipeline stage after decode: add the vehicle's derived values to its updates"""
+    tracker = derived_telemetry.get(sysid)
+    if tracker is None:
+        tracker = derived_telemetry[sysid] = DerivedTelemetry()
+    
+    updates.update(tracker.update(updates, time.time() if now is None else now))
+    return updates
+
+def analyze_telemetry(sysid, updates, now=None):
+    """Pipeline stage after derive: run the vehicle's anomaly detectors"""
+    detector = anomaly_detectors.get(sysid)
+    if detector is None:
+        detector = anomaly_detectors[sysid] = AnomalyDetector(sysid)
+    
+    return detector.update(updates, time.time() if now is None else now)
+
+def ongoing_anomalies(sysid):
+    """Current copies of the vehicle's active anomalies, with up-to-date count and value"""
+    detector = anomaly_detectors.get(sysid)
+    return detector.active_events() if detector is not None else []
+
+def record_telemetry(sysid, updates, messages, events=(), ongoing=(), endpoint=None):
+    """Merge decoded updates for one vehicle into the shared bridge state"""
+    global is_connected
+    
+    with state_lock:
+        if endpoint is not None:
+            endpoints = vehicle_endpoints.setdefault(sysid, set())
+            if endpoint not in endpoints:
+                if endpoints:
+                    # Two vehicles sharing a sysid get merged into one entry
+                    print(f"Warning: sysid {sysid} seen on {endpoint} and {', '.join(sorted(endpoints))}; "
+                          "give each vehicle its own system id")
+                endpoints.add(endpoint)
+        
+        for event in events:
+            anomaly_events.append(event)
+            key = (event['sysid'], event['field'], event['kind'])
+            if event['state'] == 'cleared':
+                active_anomalies.pop(key, None)
+            else:
+                active_anomalies[key] = event
+        
+        # Repeats only change count/value on the detector's copy; refresh ours
+        for event in ongoing:
+            active_anomalies[(event['sysid'], event['field'], event['kind'])] = event
+        
+        mavlink_messages.extend(messages)
+        if len(mavlink_messages) > 100:
+            del mavlink_messages[:-100]
+        
+        if updates:
+            vehicle = vehicle_telemetry.setdefault(sysid, {})
+            vehicle.update(updates)
+            current_telemetry.update(updates)
+            
+            if telemetry_table is not None:
+                telemetry_table.publish(sysid, vehicle)
+        
+        is_connected = True
+
 def parse_mavlink_messages(connection):
     """Read and parse MAVLink messages from simulator"""
-    global current_telemetry, mavlink_messages, is_connected
+    global is_connected
     
     while True:
         try:
@@ -73,91 +358,205 @@ def parse_mavlink_messages(connection):
                 time.sleep(0.01)
                 continue
             
-            # Record message
-            msg_dict = msg.to_dict()
-            mavlink_messages.append(msg_dict)
-            if len(mavlink_messages) > 100:
-                mavlink_messages.pop(0)
-            
-            is_connected = True
-            
-            # Parse common messages
-            if msg.get_type() == 'GLOBAL_POSITION_INT':
-                current_telemetry.update({
-                    'latitude': msg.lat / 1e7,
-                    'longitude': msg.lon / 1e7,
-                    'altitude': msg.alt / 1000,  # mm to m
-                    'relative_alt': msg.relative_alt / 1000,
-                    'vx': msg.vx / 100,  # cm/s to m/s
-                    'vy': msg.vy / 100,
-                    'vz': msg.vz / 100,
-                    'hdg': msg.hdg / 100,  # deg*100 to deg
-                })
-                # Calculate speed
-                speed = (msg.vx**2 + msg.vy**2)**0.5 / 100
-                current_telemetry['speed'] = speed
-            
-            elif msg.get_type() == 'ATTITUDE':
-                current_telemetry.update({
-                    'roll': msg.roll,
-                    'pitch': msg.pitch,
-                    'yaw': msg.yaw,
-                })
+            if msg.get_type() == 'BAD_DATA':
+                # Corrupted frame; the sequence gap it leaves is counted as loss
+                continue
             
-            elif msg.get_type() == 'HEARTBEAT':
-                current_telemetry.update({
-                    'heartbeat': msg.system_status != 0,
-                    'flight_mode': msg.custom_mode,
-                    'autopilot': msg.autopilot,
-                })
+            header = message_header(msg)
+            if header is None:
+                continue
             
-            elif msg.get_type() == 'BATTERY_STATUS':
-                current_telemetry['battery'] = msg.battery_remaining
+            # Record message
+            sysid, compid, seq = header
+            updates = decode_telemetry(msg) or {}
+            updates.update(track_link_quality(sysid, compid, seq))
+            derive_telemetry(sysid, updates)
+            events = analyze_telemetry(sysid, updates)
             
-            elif msg.get_type() == 'GPS_RAW_INT':
-                current_telemetry.update({
-                    'satellites': msg.satellites_visible,
-                    'fix_type': msg.fix_type,
-                })
+            record_telemetry(sysid, updates, message_log_entries(msg), events, ongoing_anomalies(sysid), connection.address)
             
-            elif msg.get_type() == 'VFR_HUD':
-                current_telemetry.update({
-                    'airspeed': msg.airspeed,
-                    'groundspeed': msg.groundspeed,
-                    'heading': msg.heading,
-                    'throttle': msg.throttle,
-                    'altitude': msg.alt,
-                    'climb_rate': msg.climb,
-                })
+        except Exception as e:
+            print(f"Error reading MAVLink message: {e}")
+            is_connected = False
+            time.sleep(0.1)
+
+def parse_routed_messages(link, router, decoded_ids):
+    """Forward raw frames from the simulator and decode only the ones the dashboard uses"""
+    global is_connected
+    
+    while True:
+        try:
+            data = link.recv()
+            if not data:
+                select.select([link.fd], [], [], 0.1)
+                continue
             
-            elif msg.get_type() == 'SYSTEM_STATUS':
-                current_telemetry['battery'] = msg.battery_remaining
-                current_telemetry['load'] = msg.load
+            for sysid, compid, seq, msg in route_frames(link, router, data, decoded_ids):
+                updates = (decode_telemetry(msg) if msg is not None else None) or {}
+                updates.update(track_link_quality(sysid, compid, seq))
+                derive_telemetry(sysid, updates)
+                events = analyze_telemetry(sysid, updates)
+                
+                record_telemetry(sysid, updates, [msg.to_dict()] if msg is not None else [], events, ongoing_anomalies(sysid), link.address)
             
         except Exception as e:
-            print(f"Error reading MAVLink message: {e}")
+            print(f"Error routing MAVLink data: {e}")
             is_connected = False
             time.sleep(0.1)
 
-def connect_to_simulator(host, port):
+def ingest_worker(host, ports, pipe, dialect=None, flush_interval=0.05, routes=None):
+    """Worker process: decode a shard of vehicle endpoints and ship compact updates"""
+    mavutil = load_mavutil(dialect)
+    connections = [mavutil.mavlink_connection(f'udpin:{host}:{port}') for port in ports]
+    by_fd = {conn.fd: conn for conn in connections}
+    print(f"  Ingest worker {os.getpid()} listening on {host}:{', '.join(map(str, ports))}")
+    
+    # Each worker forwards its own shard, so raw frames never cross the pipe
+    worker_router = None
+    if routes:
+        worker_router = MAVLinkRouter(routes)
+        for conn in connections:
+            worker_router.add_vehicle_link(conn)
+        worker_router.start()
+        decoded_ids = decoded_message_ids(mavutil)
+    
+    pending = {}
+    messages = []
+    events = []
+    ongoing = {}
+    sources = {}  # sysid -> endpoint, for the front's duplicate-sysid check
+    last_flush = time.time()
+    
+    while True:
+        try:
+            ready, _, _ = select.select(list(by_fd), [], [], flush_interval)
+            for fd in ready:
+                conn = by_fd[fd]
+                if worker_router is not None:
+                    while True:
+                        data = conn.recv()
+                        if not data:
+                            break
+                        for sysid, compid, seq, msg in route_frames(conn, worker_router, data, decoded_ids):
+                            updates = (decode_telemetry(msg) if msg is not None else None) or {}
+                            updates.update(track_link_quality(sysid, compid, seq))
+                            pending.setdefault(sysid, {}).update(derive_telemetry(sysid, updates))
+                            events.extend(analyze_telemetry(sysid, updates))
+                            ongoing[sysid] = ongoing_anomalies(sysid)
+                            sources[sysid] = conn.address
+                            if msg is not None:
+                                messages.append(msg.to_dict())
+                    continue
+                
+                # Drain every datagram already queued on this endpoint
+                while True:
+                    msg = conn.recv_msg()
+                    if msg is None:
+                        break
+                    if msg.get_type() == 'BAD_DATA':
+                        continue
+                    
+                    header = message_header(msg)
+                    if header is None:
+                        continue
+                    
+                    sysid, compid, seq = header
+                    updates = decode_telemetry(msg) or {}
+                    updates.update(track_link_quality(sysid, compid, seq))
+                    pending.setdefault(sysid, {}).update(derive_telemetry(sysid, updates))
+                    events.extend(analyze_telemetry(sysid, updates))
+                    ongoing[sysid] = ongoing_anomalies(sysid)
+                    sources[sysid] = conn.address
+                    messages.extend(message_log_entries(msg))
+            
+            now = time.time()
+            if (pending or messages) and now - last_flush >= flush_interval:
+                # Only the latest value of each field and the newest log lines cross the pipe
+                pipe.send((pending, messages[-10:], events, ongoing, sources))
+                pending = {}
+                messages = []
+                events = []
+                ongoing = {}
+                sources = {}
+                last_flush = now
+        
+        except (EOFError, BrokenPipeError, KeyboardInterrupt):
+            break
+        except Exception as e:
+            print(f"Ingest worker {os.getpid()} error: {e}")
+            time.sleep(0.1)
+
+def receive_worker_updates(pipe):
+    """Front-process thread: apply batches published by one ingest worker"""
+    global is_connected
+    
+    while True:
+        try:
+            pending, messages, events, ongoing, sources = pipe.recv()
+        except (EOFError, OSError):
+            print("Ingest worker exited")
+            is_connected = False
+            return
+        
+        if not pending:
+            record_telemetry(None, None, messages, events)
+        for sysid, updates in pending.items():
+            record_telemetry(sysid, updates, messages, events, ongoing.get(sysid, ()), sources.get(sysid))
+            messages = []
+            events = []
+
+def start_ingest_workers(host, ports, workers, dialect=None, routes=None):
+    """Shard simulator endpoints across a pool of ingest worker processes"""
+    workers = min(workers, len(ports))
+    shards = [ports[i::workers] for i in range(workers)]
+    
+    print(f"Starting {workers} ingest worker(s) for {len(ports)} endpoint(s)...")
+    for shard in shards:
+        front_end, worker_end = multiprocessing.Pipe(duplex=False)
+        process = multiprocessing.Process(
+            target=ingest_worker,
+            args=(host, shard, worker_end, dialect, 0.05, routes),
+            daemon=True
+        )
+        process.start()
+        worker_end.close()
+        
+        threading.Thread(
+            target=receive_worker_updates,
+            args=(front_end,),
+            daemon=True
+        ).start()
+
+def connect_to_simulator(host, port, dialect=None, router=None):
     """Connect to MAVLink simulator"""
     global connection, is_connected
     
     print(f"Connecting to simulator at {host}:{port}...")
+    # Imported here so the HTTP server is up before pymavlink finishes loading
+    mavutil = load_mavutil(dialect)
     
     while True:
         try:
-            connection = mavutil.mavlink_connection(f'udpin:{host}:{port}')
-            connection.wait_heartbeat()
-            print("✓ Connected to simulator!")
+            link = mavutil.mavlink_connection(f'udpin:{host}:{port}')
+            connection = link
+            link.wait_heartbeat()
+            print(f"✓ Connected to simulator on port {port}!")
             is_connected = True
             
             # Start message parsing thread
-            msg_thread = threading.Thread(
-                target=parse_mavlink_messages,
-                args=(connection,),
-                daemon=True
-            )
+            if router is not None:
+                router.add_vehicle_link(link)
+                msg_thread = threading.Thread(
+                    target=parse_routed_messages,
+                    args=(link, router, decoded_message_ids(mavutil)),
+                    daemon=True
+                )
+            else:
+                msg_thread = threading.Thread(
+                    target=parse_mavlink_messages,
+                    args=(link,),
+                    daemon=True
+                )
             msg_thread.start()
             
             break
@@ -166,21 +565,50 @@ def connect_to_simulator(host, port):
             is_connected = False
             time.sleep(2)
 
-def run_server(bridge_host, bridge_port, simulator_host, simulator_port):
+def run_server(bridge_host, bridge_port, simulator_host, simulator_port, workers=0, shm_name=None, dialect=None, routes=None):
     """Run the HTTP bridge server"""
+    global telemetry_table, router
     
-    # Connect to simulator in background
-    sim_thread = threading.Thread(
-        target=connect_to_simulator,
-        args=(simulator_host, simulator_port),
-        daemon=True
-    )
-    sim_thread.start()
+    if isinstance(simulator_port, int):
+        simulator_port = [simulator_port]
+    
+    # Validate routes before anything (like the shm table) is created that would need cleanup
+    kinds = [parse_route(spec)[0] for spec in routes or ()]
+    if workers > 0 and min(workers, len(simulator_port)) > 1 and ({'udp', 'udpin'} & set(kinds)):
+        # Every worker routes its own shard: udpin would bind the same port, and a
+        # udp peer replying to the last address it heard from would hand commands
+        # to a worker that doesn't own the target vehicle
+        raise ValueError("udp/udpin routes need a single router; use tcp: routes or --workers 1")
+    if routes and workers == 0:
+        router = MAVLinkRouter(routes)
+    
+    if shm_name:
+        telemetry_table = TelemetryTableWriter(shm_name)
+        print(f"Publishing telemetry to shared memory '{shm_name}'")
+    
+    if routes:
+        print(f"Routing raw MAVLink to {', '.join(routes)}")
+    
+    if workers > 0:
+        # Decode in worker processes; this process only serves clients
+        start_ingest_workers(simulator_host, simulator_port, workers, dialect, routes)
+    else:
+        if router is not None:
+            router.start()
+        
+        # Connect to simulator in background
+        for port in simulator_port:
+            sim_thread = threading.Thread(
+                target=connect_to_simulator,
+                args=(simulator_host, port, dialect, router),
+                daemon=True
+            )
+            sim_thread.start()
     
     # Start HTTP server
-    server = HTTPServer((bridge_host, bridge_port), MAVLinkBridgeHandler)
+    server = ThreadingHTTPServer((bridge_host, bridge_port), MAVLinkBridgeHandler)
     print(f"MAVLink Bridge running on http://{bridge_host}:{bridge_port}")
-    print(f"Waiting for simulator at {simulator_host}:{simulator_port}")
+    print(f"Waiting for simulator at {simulator_host}:{', '.join(map(str, simulator_port))}")
     print("Press Ctrl+C to stop\n")
     
     try:
@@ -188,6 +616,9 @@ def run_server(bridge_host, bridge_port, simulator_host, simulator_port):
     except KeyboardInterrupt:
         print("\n\nShutting down...")
         server.shutdown()
+    finally:
+        if telemetry_table is not None:
+            telemetry_table.close()
 
 def main():
     parser = argparse.ArgumentParser(
@@ -201,8 +632,9 @@ def main():
     parser.add_argument(
         '--sim-port',
         type=int,
-        default=14540,
-        help='Simulator port - use 14540 for PX4, 14550 for ArduPilot (default: 14540)'
+        nargs='+',
+        default=[14540],
+        help='Simulator port(s) - use 14540 for PX4, 14550 for ArduPilot (default: 14540)'
     )
     parser.add_argument(
         '--bridge-host',
@@ -215,6 +647,29 @@ def main():
         default=5000,
         help='Bridge server port (default: 5000)'
     )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=0,
+        help='Ingest worker processes to shard simulator ports across; 0 decodes in-process (default: 0)'
+    )
+    parser.add_argument(
+        '--shm',
+        default=None,
+        help='Publish latest telemetry to this shared memory table for local readers (default: off)'
+    )
+    parser.add_argument(
+        '--dialect',
+        default=None,
+        help="MAVLink dialect: 'trimmed' for the cached minimal dialect, or a pymavlink dialect name (default: pymavlink's)"
+    )
+    parser.add_argument(
+        '--route',
+        action='append',
+        default=None,
+        metavar='SPEC',
+        help='Forward raw MAVLink to udp:HOST:PORT, udpin:HOST:PORT or tcp:HOST:PORT; repeat for more endpoints (default: off)'
+    )
     
     args = parser.parse_args()
     
@@ -222,7 +677,11 @@ def main():
         args.bridge_host,
         args.bridge_port,
         args.sim_host,
-        args.sim_port
+        args.sim_port,
+        args.workers,
+        args.shm,
+        args.dialect,
+        args.route
     )
 
 if __name__ == '__main__':
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Trimmed MAVLink Dialect Loader
+Builds a pymavlink dialect containing only the messages the bridge and
+simulators use, caches the generated module on disk, and imports pymavlink
+lazily so startup does not pay for hundreds of unused message classes.
+
+The trimmed module keeps the upstream field layouts and CRC extras, so it
+talks to any ArduPilot/PX4 vehicle; messages outside the set arrive as
+undecoded MAVLink_unknown objects instead of being unpacked (the bridge
+reads their header for link quality but leaves them out of its message log).
+
+Usage:
+    python3 mavlink_bridge.py --dialect trimmed
+    python3 ardupilot_sim.py --dialect trimmed
+
+    python3 mavlink_dialect.py    # pre-build the cache, e.g. in a container image
+"""
+
+import hashlib
+import importlib.util
+import os
+import sys
+import threading
+
+# Generation-only modules (xml, tempfile, py_compile, mavgen) are imported
+# inside the functions that need them to keep the cached path cheap.
+
+TRIMMED_DIALECT = 'vyom_trimmed'
+
+# Everything decoded by mavlink_bridge.py or sent by the simulators
+MESSAGES = (
+    'HEARTBEAT',
+    'SYS_STATUS',
+    'SYSTEM_TIME',
+    'GPS_RAW_INT',
+    'ATTITUDE',
+    'GLOBAL_POSITION_INT',
+    'VFR_HUD',
+    'BATTERY_STATUS',
+    'POSITION_TARGET_GLOBAL_INT',
+    'HOME_POSITION',
+)
+
+# Enums mavutil dereferences on its own, whichever messages are kept
+ENUMS = (
+    'MAV_AUTOPILOT',
+    'MAV_TYPE',
+    'MAV_COMPONENT',
+    'MAV_MODE',
+    'MAV_MODE_FLAG',
+    'MAV_STATE',
+    'MAV_CMD',
+    'SERIAL_CONTROL_FLAG',
+)
+
+CACHE_DIR = os.environ.get(
+    'VYOM_DIALECT_CACHE',
+    os.path.join(os.path.expanduser('~'), '.cache', 'vyom-garud', 'dialects')
+)
+
+_load_lock = threading.Lock()
+
+def _definitions_dir():
+    """Directory holding the XML definitions shipped with pymavlink"""
+    spec = importlib.util.find_spec('pymavlink')
+    return os.path.join(os.path.dirname(spec.origin), 'dialects', 'v20')
+
+def _collect_definitions(path, seen, messages, enums):
+    """Walk an XML definition and its includes, gathering messages and enums"""
+    import xml.etree.ElementTree as ET
+
+    path = os.path.abspath(path)
+    if path in seen:
+        return
+    seen.add(path)
+
+    root = ET.parse(path).getroot()
+    for include in root.findall('include'):
+        _collect_definitions(os.path.join(os.path.dirname(path), include.text.strip()), seen, messages, enums)
+
+    for message in root.iter('message'):
+        messages.setdefault(message.get('name'), message)
+
+    for enum in root.iter('enum'):
+        # Dialects extend enums from the files they include; merge the entries
+        merged = enums.setdefault(enum.get('name'), ET.Element('enum', enum.attrib))
+        known = {entry.get('name') for entry in merged.findall('entry')}
+        for child in enum:
+            if child.tag == 'entry' and child.get('name') in known:
+                continue
+            merged.append(child)
+
+def build_trimmed_xml(messages=MESSAGES, base='ardupilotmega.xml'):
+    """Return a self-contained definition with only the requested messages"""
+    import xml.etree.ElementTree as ET
+
+    found, enums = {}, {}
+    _collect_definitions(os.path.join(_definitions_dir(), base), set(), found, enums)
+
+    missing = [name for name in messages if name not in found]
+    if missing:
+        raise ValueError(f"Unknown MAVLink message(s): {', '.join(missing)}")
+
+    kept = [found[name] for name in messages]
+    enum_names = {field.get('enum') for message in kept for field in message.iter('field')}
+    enum_names.update(ENUMS)
+
+    root = ET.Element('mavlink')
+    ET.SubElement(root, 'version').text = '3'
+    ET.SubElement(root, 'dialect').text = '0'
+    enums_element = ET.SubElement(root, 'enums')
+    for name in sorted(name for name in enum_names if name):
+        enums_element.append(enums[name])
+    messages_element = ET.SubElement(root, 'messages')
+    for message in sorted(kept, key=lambda m: int(m.get('id'))):
+        messages_element.append(message)
+
+    return ET.tostring(root, encoding='unicode')
+
+def build_trimmed_dialect(messages=MESSAGES, cache_dir=CACHE_DIR):
+    """Generate (once) and return the path of the cached trimmed dialect module"""
+    from pymavlink import __version__ as pymavlink_version
+
+    key = hashlib.sha1(
+        f"{pymavlink_version}:{','.join(sorted(messages))}:{','.join(ENUMS)}".encode()
+    ).hexdigest()[:12]
+    path = os.path.join(cache_dir, f'{TRIMMED_DIALECT}_{key}.py')
+    if os.path.exists(path):
+        return path
+
+    import contextlib
+    import io
+    import py_compile
+    import tempfile
+    from pymavlink.generator import mavgen
+
+    os.makedirs(cache_dir, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=cache_dir) as work_dir:
+        xml_path = os.path.join(work_dir, f'{TRIMMED_DIALECT}.xml')
+        with open(xml_path, 'w') as f:
+            f.write(build_trimmed_xml(messages))
+
+        output = os.path.join(work_dir, f'{TRIMMED_DIALECT}.py')
+        opts = mavgen.Opts(output, wire_protocol='2.0', language='Python', validate=False)
+        # mavgen reports every file it parses; keep startup output clean
+        with contextlib.redirect_stdout(io.StringIO()):
+            if not mavgen.mavgen(opts, [xml_path]):
+                raise RuntimeError("mavgen failed to generate the trimmed dialect")
+
+        # Precompile next to the final path so even the first import skips parsing
+        py_compile.compile(output, cfile=importlib.util.cache_from_source(path), doraise=True)
+        # Atomic so concurrent bridges/simulators never import a partial file
+        os.replace(output, path)
+
+    return path
+
+def load_target_offsets(base='ardupilotmega.xml', cache_dir=CACHE_DIR):
+    """Map msgid -> (target_system, target_component) payload offsets for routing
+
+    Offsets come from the XML definitions rather than a dialect module, so
+    routing sees every targeted message even with the trimmed dialect.
+    Component offset is -1 for messages that only carry a target system.
+    """
+    import json
+    from pymavlink import __version__ as pymavlink_version
+
+    path = os.path.join(cache_dir, f'target_offsets_{pymavlink_version}_{os.path.splitext(base)[0]}.json')
+    if os.path.exists(path):
+        with open(path) as f:
+            return {int(msgid): tuple(offsets) for msgid, offsets in json.load(f).items()}
+
+    import contextlib
+    import io
+    from pymavlink.generator import mavparse
+
+    offsets = {}
+    pending, seen = [os.path.join(_definitions_dir(), base)], set()
+    with contextlib.redirect_stdout(io.StringIO()):
+        while pending:
+            xml_path = os.path.abspath(pending.pop())
+            if xml_path in seen:
+                continue
+            seen.add(xml_path)
+            definition = mavparse.MAVXML(xml_path, '2.0')
+            pending.extend(os.path.join(os.path.dirname(xml_path), i) for i in definition.include)
+            for message in definition.message:
+                fields = {field.name: field.wire_offset for field in message.ordered_fields}
+                if 'target_system' in fields:
+                    offsets[message.id] = (fields['target_system'], fields.get('target_component', -1))
+
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(offsets, f)
+    os.replace(tmp_path, path)
+    return offsets
+
+def load_trimmed_dialect(messages=MESSAGES):
+    """Import the trimmed dialect and register it where pymavlink looks for dialects"""
+    with _load_lock:
+        module = sys.modules.get(f'pymavlink.dialects.v20.{TRIMMED_DIALECT}')
+        if module is not None:
+            return module
+
+        path = build_trimmed_dialect(messages)
+        spec = importlib.util.spec_from_file_location(f'pymavlink.dialects.v20.{TRIMMED_DIALECT}', path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+
+        # The v2 parser also accepts v1 frames, so serve both wire versions
+        import pymavlink.dialects.v10
+        import pymavlink.dialects.v20
+        for package in (pymavlink.dialects.v10, pymavlink.dialects.v20):
+            sys.modules[f'{package.__name__}.{TRIMMED_DIALECT}'] = module
+            setattr(package, TRIMMED_DIALECT, module)
+
+        return module
+
+def load_dialect_module(dialect=None):
+    """Return a MAVLink dialect module ('trimmed' or any pymavlink dialect name)"""
+    if dialect == 'trimmed':
+        return load_trimmed_dialect()
+    return importlib.import_module(f'pymavlink.dialects.v20.{dialect or "ardupilotmega"}')
+
+def load_mavutil(dialect=None):
+    """Import pymavlink.mavutil with the requested dialect selected"""
+    if dialect == 'trimmed':
+        load_trimmed_dialect()
+        dialect = TRIMMED_DIALECT
+
+    if 'pymavlink.mavutil' not in sys.modules:
+        if dialect:
+            # mavutil loads MAVLINK_DIALECT at import time; choose it up front
+            os.environ['MAVLINK_DIALECT'] = dialect
+        if dialect == TRIMMED_DIALECT:
+            # mavutil also imports the huge v1.0 'all' dialect purely as a
+            # pyinstaller hint; satisfy that import with the trimmed module
+            sys.modules.setdefault('pymavlink.dialects.v10.all', sys.modules[f'pymavlink.dialects.v10.{TRIMMED_DIALECT}'])
+        from pymavlink import mavutil
+    else:
+        from pymavlink import mavutil
+        if dialect and mavutil.current_dialect != dialect:
+            mavutil.set_dialect(dialect)
+
+    return mavutil
+
+if __name__ == '__main__':
+    print(f"Trimmed dialect cached at {build_trimmed_dialect()}")
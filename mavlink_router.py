@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+In-Process MAVLink Router
+Forwards raw MAVLink frames byte-for-byte between the vehicle links the
+bridge owns and any number of extra endpoints (a second GCS, a logger, a
+companion process), like a lightweight mavlink-router.
+
+Frames are never decoded: only the header is read, plus the target
+system/component bytes of targeted messages, whose payload offsets come
+from the XML definitions (mavlink_dialect.load_target_offsets). Routing
+follows the usual MAVLink rules:
+
+    - every endpoint and vehicle link learns the (system, component) ids
+      seen coming from it
+    - broadcast messages (target 0, or no target) go everywhere except back
+      to where they came from
+    - targeted messages go only to the links that have seen that system, and
+      of those only to the ones that have seen the target component when it
+      is set (e.g. a gimbal or camera on its own link); if nobody has seen
+      the target yet they go everywhere
+
+When every frame in a datagram routes the same way the datagram is sent
+as-is, so the common case costs one sendto per destination.
+
+Endpoint specs:
+    udp:HOST:PORT      send to HOST:PORT and accept its replies
+    udpin:HOST:PORT    listen on HOST:PORT; forward to every peer that has sent to it
+    tcp:HOST:PORT      connect to a TCP server, reconnecting as needed
+
+Usage:
+    python3 mavlink_bridge.py --route udp:127.0.0.1:14560 --route tcp:127.0.0.1:5760
+"""
+
+import errno
+import select
+import socket
+import threading
+import time
+
+from mavlink_dialect import load_target_offsets
+
+MAVLINK_STX_V1 = 0xFE
+MAVLINK_STX_V2 = 0xFD
+MAVLINK_IFLAG_SIGNED = 0x01
+MAVLINK_SIGNATURE_LEN = 13
+
+# Windows reports these with its own WSA* codes
+CONNECT_PENDING = {errno.EINPROGRESS, errno.EWOULDBLOCK, getattr(errno, 'WSAEWOULDBLOCK', errno.EWOULDBLOCK)}
+PEER_UNREACHABLE = {errno.ECONNREFUSED, errno.ECONNRESET, getattr(errno, 'WSAECONNRESET', errno.ECONNRESET)}
+
+def split_frames(buf, target_offsets):
+    """Find complete frames in buf without decoding payloads
+
+    Returns (frames, consumed): each frame is (start, end, sysid, compid, seq,
+    msgid, target_system, target_component); consumed is where the next call should
+    resume so a partial frame at the end can be completed by more bytes.
+    """
+    frames = []
+    pos, size = 0, len(buf)
+
+    while pos < size:
+        stx = buf[pos]
+        if stx == MAVLINK_STX_V2:
+            if size - pos < 10:
+                break
+            length = buf[pos + 1]
+            end = pos + 12 + length
+            if buf[pos + 2] & MAVLINK_IFLAG_SIGNED:
+                end += MAVLINK_SIGNATURE_LEN
+            seq, sysid, compid = buf[pos + 4], buf[pos + 5], buf[pos + 6]
+            msgid = buf[pos + 7] | buf[pos + 8] << 8 | buf[pos + 9] << 16
+            payload = pos + 10
+        elif stx == MAVLINK_STX_V1:
+            if size - pos < 6:
+                break
+            length = buf[pos + 1]
+            end = pos + 8 + length
+            seq, sysid, compid = buf[pos + 2], buf[pos + 3], buf[pos + 4]
+            msgid = buf[pos + 5]
+            payload = pos + 6
+        else:
+            # Not a frame start; resynchronise on the next STX byte
+            pos += 1
+            continue
+
+        if end > size:
+            break
+
+        target_system = target_component = 0
+        offsets = target_offsets.get(msgid)
+        if offsets is not None:
+            # MAVLink 2 trims trailing zero bytes, so a missing byte means 0
+            if offsets[0] < length:
+                target_system = buf[payload + offsets[0]]
+            if 0 <= offsets[1] < length:
+                target_component = buf[payload + offsets[1]]
+
+        frames.append((pos, end, sysid, compid, seq, msgid, target_system, target_component))
+        pos = end
+
+    return frames, pos
+
+class UDPEndpoint:
+    """UDP endpoint: fixed peer ('udp') or learned peers ('udpin')"""
+
+    def __init__(self, spec, host, port, listen):
+        self.spec = spec
+        self.sysids = set()
+        self.components = set()  # (sysid, compid)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setblocking(False)
+        if listen:
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            self.sock.bind((host, port))
+            self.peers = set()
+        else:
+            self.peers = {(host, port)}
+        self.errors = 0
+
+    def fileno(self):
+        return self.sock.fileno()
+
+    def wants_write(self):
+        return False
+
+    def send(self, data):
+        for peer in self.peers:
+            try:
+                self.sock.sendto(data, peer)
+            except OSError:
+                # Peer not listening (ECONNREFUSED) or buffer full; drop like a radio would
+                self.errors += 1
+
+    def receive(self):
+        datagrams = []
+        while True:
+            try:
+                data, addr = self.sock.recvfrom(65535)
+            except BlockingIOError:
+                break
+            except OSError as e:
+                # ICMP port unreachable from a 'udp:' peer that isn't listening
+                if e.errno in PEER_UNREACHABLE or getattr(e, 'winerror', None) in PEER_UNREACHABLE:
+                    break
+                raise
+            self.peers.add(addr)
+            datagrams.append(data)
+        return datagrams
+
+    def flush(self):
+        pass
+
+class TCPEndpoint:
+    """TCP client endpoint with a bounded, non-blocking send buffer"""
+
+    def __init__(self, spec, host, port, max_buffer=1 << 20, retry_interval=2.0):
+        self.spec = spec
+        self.address = (host, port)
+        self.sysids = set()
+        self.components = set()  # (sysid, compid)
+        self.max_buffer = max_buffer  # a slow consumer loses frames instead of stalling the router
+        self.retry_interval = retry_interval
+        self.sock = None
+        self.connected = False
+        self.next_attempt = 0.0
+        self.out = bytearray()
+        self.rx = bytearray()
+        self.lock = threading.Lock()
+        self.errors = 0
+
+    def fileno(self):
+        return self.sock.fileno() if self.sock is not None else -1
+
+    def connect(self):
+        """Start a non-blocking connect if we are not connected and may retry"""
+        if self.sock is not None or time.monotonic() < self.next_attempt:
+            return
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setblocking(False)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        result = self.sock.connect_ex(self.address)
+        if result not in CONNECT_PENDING and result != 0:
+            self.close()
+        else:
+            self.connected = result == 0
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+        self.sock = None
+        self.connected = False
+        self.out.clear()
+        self.rx.clear()
+        self.next_attempt = time.monotonic() + self.retry_interval
+
+    def wants_write(self):
+        return self.sock is not None and (not self.connected or bool(self.out))
+
+    def send(self, data):
+        with self.lock:
+            if self.sock is None:
+                return
+            if len(self.out) + len(data) > self.max_buffer:
+                self.errors += 1
+                return
+            self.out += data
+        if self.connected:
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            if self.sock is None:
+                return
+            if not self.connected:
+                # Only reached once select reports the pending connect as writable;
+                # finish it even with nothing queued, or select keeps reporting it
+                error = self.sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                if error:
+                    self.close()
+                    return
+                self.connected = True
+            if not self.out:
+                return
+            try:
+                sent = self.sock.send(self.out)
+                del self.out[:sent]
+            except BlockingIOError:
+                pass
+            except OSError:
+                self.close()
+
+    def receive(self):
+        # Locked: a failed send() on another thread may close the socket under us
+        with self.lock:
+            if self.sock is None:
+                return []
+            try:
+                data = self.sock.recv(65536)
+            except BlockingIOError:
+                return []
+            except OSError:
+                data = b''
+            if not data:
+                self.close()
+                return []
+            self.connected = True
+        return [data]
+
+def parse_route(spec):
+    """Split a 'udp:', 'udpin:' or 'tcp:' spec into (kind, host, port)"""
+    try:
+        kind, host, port = spec.split(':')
+        port = int(port)
+    except ValueError:
+        raise ValueError(f"Invalid route '{spec}', expected udp:HOST:PORT, udpin:HOST:PORT or tcp:HOST:PORT")
+    if kind not in ('udp', 'udpin', 'tcp'):
+        raise ValueError(f"Unknown route type '{kind}' in '{spec}'")
+    return kind, host, port
+
+def create_endpoint(spec):
+    """Build an endpoint from a 'udp:', 'udpin:' or 'tcp:' spec"""
+    kind, host, port = parse_route(spec)
+    if kind == 'udp':
+        return UDPEndpoint(spec, host, port, listen=False)
+    elif kind == 'udpin':
+        return UDPEndpoint(spec, host, port, listen=True)
+    return TCPEndpoint(spec, host, port)
+
+class VehicleLink:
+    """A bridge-owned vehicle connection as seen by the router"""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.sysids = set()
+        self.components = set()  # (sysid, compid)
+
+    def send(self, data):
+        try:
+            self.connection.write(data)
+        except OSError:
+            pass
+
+class MAVLinkRouter:
+    """Routes raw frames between vehicle links and extra endpoints"""
+
+    def __init__(self, specs, target_offsets=None):
+        self.target_offsets = load_target_offsets() if target_offsets is None else target_offsets
+        self.endpoints = [create_endpoint(spec) for spec in specs]
+        self.vehicles = {}  # connection -> VehicleLink
+        self.lock = threading.Lock()
+        self.running = False
+        self.stats = {'from_vehicles': 0, 'to_vehicles': 0, 'forwarded': 0}
+
+    def add_vehicle_link(self, connection):
+        """Register a vehicle connection for return traffic"""
+        with self.lock:
+            link = self.vehicles.get(connection)
+            if link is None:
+                link = self.vehicles[connection] = VehicleLink(connection)
+            return link
+
+    def _destinations(self, source, frame):
+        _, _, sysid, compid, _, _, target_system, target_component = frame
+        source.sysids.add(sysid)
+        source.components.add((sysid, compid))
+
+        links = [link for link in self.vehicles.values() if link is not source]
+        links.extend(endpoint for endpoint in self.endpoints if endpoint is not source)
+        if target_system == 0:
+            return links
+
+        targeted = [link for link in links if target_system in link.sysids]
+        if target_component:
+            target = (target_system, target_component)
+            targeted = [link for link in targeted if target in link.components] or targeted
+        return targeted or links
+
+    def route(self, source, data, frames):
+        """Forward the frames of one chunk from source; return the number of frames"""
+        view = memoryview(data)
+        with self.lock:
+            routes = [self._destinations(source, frame) for frame in frames]
+
+        whole = (
+            routes
+            and frames[0][0] == 0
+            and frames[-1][1] == len(data)
+            and all(route == routes[0] for route in routes)
+        )
+        if whole:
+            # Common case: one sendto per destination for the untouched datagram
+            for destination in routes[0]:
+                destination.send(view)
+                self.stats['forwarded'] += 1
+        else:
+            for frame, destinations in zip(frames, routes):
+                chunk = view[frame[0]:frame[1]]
+                for destination in destinations:
+                    destination.send(chunk)
+                    self.stats['forwarded'] += 1
+        return len(frames)
+
+    def from_vehicle(self, connection, data):
+        """Route bytes read from a vehicle link; return the frames found in them"""
+        link = self.vehicles.get(connection) or self.add_vehicle_link(connection)
+        frames, _ = split_frames(data, self.target_offsets)
+        if frames:
+            self.route(link, data, frames)
+            self.stats['from_vehicles'] += len(frames)
+        return frames
+
+    def _from_endpoint(self, endpoint, data):
+        if isinstance(endpoint, TCPEndpoint):
+            # Stream transport: frames may straddle reads
+            endpoint.rx += data
+            data = bytes(endpoint.rx)
+            frames, consumed = split_frames(data, self.target_offsets)
+            del endpoint.rx[:consumed]
+            data = data[:consumed]
+        else:
+            frames, _ = split_frames(data, self.target_offsets)
+        if frames:
+            self.stats['to_vehicles'] += self.route(endpoint, data, frames)
+
+    def run(self):
+        """Service endpoint sockets: return traffic, TCP reconnects and send buffers"""
+        self.running = True
+        while self.running:
+            for endpoint in self.endpoints:
+                if isinstance(endpoint, TCPEndpoint):
+                    self._service(endpoint, endpoint.connect)
+
+            readable = [e for e in self.endpoints if e.fileno() >= 0]
+            writable = [e for e in readable if e.wants_write()]
+            if not readable:
+                time.sleep(0.1)
+                continue
+
+            try:
+                ready_read, ready_write, _ = select.select(readable, writable, [], 0.1)
+            except (OSError, ValueError):
+                continue
+
+            for endpoint in ready_write:
+                self._service(endpoint, endpoint.flush)
+            for endpoint in ready_read:
+                self._service(endpoint, self._receive, endpoint)
+
+    def _receive(self, endpoint):
+        for data in endpoint.receive():
+            self._from_endpoint(endpoint, data)
+
+    def _service(self, endpoint, action, *args):
+        """Run one endpoint operation; a failure must not stop routing for the others"""
+        try:
+            action(*args)
+        except Exception as e:
+            endpoint.errors += 1
+            if endpoint.errors == 1 or endpoint.errors % 100 == 0:
+                print(f"Route {endpoint.spec} error ({endpoint.errors} so far): {e}")
+            # Don't spin if the error repeats on every pass
+            time.sleep(0.01)
+
+    def start(self):
+        """Run the endpoint loop in a daemon thread"""
+        thread = threading.Thread(target=self.run, daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        self.running = False
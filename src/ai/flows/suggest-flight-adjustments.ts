@@ -1,7 +1,8 @@
 "use server";
 
 // Stubbed flow to keep references stable while AI code is removed.
-export type FlightAdjustmentInput = { telemetryData: string; weatherData: string };
+// anomalyEvents: JSON array of compact events from the bridge's /anomalies endpoint
+export type FlightAdjustmentInput = { telemetryData: string; weatherData: string; anomalyEvents?: string };
 export type FlightAdjustmentOutput = { suggestedAdjustments: string; reasoning: string };
 
 export async function suggestFlightAdjustments(_input: FlightAdjustmentInput): Promise<FlightAdjustmentOutput> {
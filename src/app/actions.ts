@@ -2,21 +2,37 @@
 
 const GEMINI_API_KEY = process.env.GOOGLE_GEMINI_API_KEY;
 
-export async function getFlightSuggestions(input: { telemetryData: string; weatherData: string }) {
+export type AnomalyEvent = {
+  sysid: number;
+  field: string;
+  kind: string;
+  severity: 'info' | 'warning' | 'critical';
+  state: 'active' | 'cleared';
+  message: string;
+  value: number;
+  since: number;
+  count: number;
+};
+
+export async function getFlightSuggestions(input: { telemetryData: string; weatherData: string; anomalyEvents?: string }) {
   try {
     // Parse input data for context
     let telemetry: any = {};
     let weather: any = {};
+    let anomalies: AnomalyEvent[] = [];
     
     try {
       telemetry = JSON.parse(input.telemetryData);
       weather = JSON.parse(input.weatherData);
+      if (input.anomalyEvents) {
+        anomalies = JSON.parse(input.anomalyEvents);
+      }
     } catch (e) {
       console.log('Could not parse input data');
     }
 
-    // Generate intelligent mock suggestions based on telemetry and weather
-    const suggestions = generateSmartSuggestions(telemetry, weather);
+    // Generate intelligent mock suggestions based on telemetry, weather and detected anomalies
+    const suggestions = generateSmartSuggestions(telemetry, weather, anomalies);
 
     return {
       success: true,
@@ -31,10 +47,35 @@ export async function getFlightSuggestions(input: { telemetryData: string; weath
   }
 }
 
-function generateSmartSuggestions(telemetry: any, weather: any) {
+// Bridge-side anomaly kinds mapped to the adjustment they call for
+const ANOMALY_ADJUSTMENTS: Record<string, string> = {
+  'battery:low': 'Return to home - Battery low',
+  'battery_drain_rate:drift': 'Reduce speed and payload - Battery draining faster than usual',
+  'satellites:low': 'Switch to a position-independent mode - GPS satellite count low',
+  'satellites:drop': 'Hold position until GPS recovers - Satellites dropped',
+  'roll:oscillation': 'Reduce speed and check roll tuning - Roll oscillation detected',
+  'pitch:oscillation': 'Reduce speed and check pitch tuning - Pitch oscillation detected',
+  'altitude:spike': 'Verify barometer/GPS altitude - Sudden altitude change',
+  'climb_rate_smoothed:spike': 'Check throttle and wind - Unexpected climb rate',
+};
+
+function generateSmartSuggestions(telemetry: any, weather: any, anomalies: AnomalyEvent[] = []) {
   const adjustments: string[] = [];
   const reasons: string[] = [];
 
+  // Detected anomalies first, most severe first
+  const severityRank = { critical: 0, warning: 1, info: 2 };
+  const activeAnomalies = anomalies
+    .filter((event) => event.state === 'active')
+    .sort((a, b) => severityRank[a.severity] - severityRank[b.severity]);
+  for (const event of activeAnomalies) {
+    const adjustment = ANOMALY_ADJUSTMENTS[`${event.field}:${event.kind}`];
+    if (adjustment) {
+      adjustments.push(`• ${adjustment}`);
+    }
+    reasons.push(`${event.message} (${event.severity}, vehicle ${event.sysid}).`);
+  }
+
   // Battery-based suggestions
   if (telemetry.battery && telemetry.battery < 50) {
     adjustments.push('• Reduce flight time - Battery below 50%');
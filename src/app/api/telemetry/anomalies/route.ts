@@ -0,0 +1,32 @@
+export const dynamic = 'force-dynamic';
+
+// Compact anomaly events detected by mavlink_bridge.py (see anomaly_detector.py)
+export async function GET() {
+  try {
+    const bridgeResponse = await fetch('http://127.0.0.1:5000/anomalies', {
+      method: 'GET',
+      cache: 'no-store',
+      signal: AbortSignal.timeout(2000), // 2 second timeout
+    });
+
+    if (bridgeResponse.ok) {
+      const bridgeData = await bridgeResponse.json();
+      return Response.json({
+        success: true,
+        timestamp: bridgeData.timestamp ?? Date.now(),
+        active: bridgeData.active ?? [],
+        recent: bridgeData.recent ?? [],
+      });
+    }
+  } catch (error) {
+    // Bridge not running (e.g. using the built-in simulator); report no anomalies
+    console.log('MAVLink bridge not available, no anomaly events');
+  }
+
+  return Response.json({
+    success: true,
+    timestamp: Date.now(),
+    active: [],
+    recent: [],
+  });
+}
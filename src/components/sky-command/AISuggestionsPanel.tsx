@@ -40,8 +40,20 @@ export function AISuggestionsPanel() {
   const handleAnalyze = async () => {
     setIsLoading(true);
     setResult(null);
+    // Send the bridge's summarized anomaly events rather than raw telemetry history
+    let anomalyEvents = "[]";
+    try {
+      const anomalyResponse = await fetch("/api/telemetry/anomalies", { cache: "no-store" });
+      if (anomalyResponse.ok) {
+        const anomalyData = await anomalyResponse.json();
+        anomalyEvents = JSON.stringify(anomalyData.active ?? []);
+      }
+    } catch (error) {
+      console.log("Could not load anomaly events");
+    }
+
     // AI has been removed; call will return a failure object. Show toast.
-    const response = await getFlightSuggestions({ telemetryData: mockTelemetryData, weatherData: mockWeatherData });
+    const response = await getFlightSuggestions({ telemetryData: mockTelemetryData, weatherData: mockWeatherData, anomalyEvents });
     setIsLoading(false);
 
     if (response.success && response.data) {
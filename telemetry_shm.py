@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Shared-Memory Telemetry Table
+Publishes the latest per-vehicle telemetry into a fixed-layout shared memory
+block so co-located processes can read it without an HTTP round trip.
+
+Layout (little-endian):
+    header   magic 'VGTT', version, field count, slot count, owner pid, field names
+    slot[n]  seq (u32), sysid (u32), updated_at (f64), one f64 per field
+
+Each slot is guarded by a seqlock: the writer bumps seq to an odd value,
+writes the slot, then bumps it to the next even value. Readers retry
+whenever they see an odd seq or the seq changed while they were copying.
+Missing fields are stored as NaN and left out of the dict a reader returns.
+
+Usage:
+    python3 mavlink_bridge.py --shm vyom_telemetry
+
+    from telemetry_shm import TelemetryTableReader
+    table = TelemetryTableReader('vyom_telemetry')
+    print(table.read(1))      # latest telemetry for sysid 1
+    print(table.read_all())   # {sysid: telemetry}
+"""
+
+import math
+import os
+import struct
+import sys
+import time
+from multiprocessing import shared_memory
+
+MAGIC = b'VGTT'
+VERSION = 2
+
+# Numeric telemetry fields published per vehicle, in slot order
+FIELDS = (
+    'latitude', 'longitude', 'altitude', 'relative_alt',
+    'vx', 'vy', 'vz', 'hdg', 'speed',
+    'roll', 'pitch', 'yaw',
+    'heartbeat', 'flight_mode', 'autopilot',
+    'battery', 'load', 'satellites', 'fix_type',
+    'airspeed', 'groundspeed', 'heading', 'throttle', 'climb_rate',
+    'home_latitude', 'home_longitude', 'target_latitude', 'target_longitude',
+    'link_latency_ms', 'link_received', 'link_lost', 'link_loss_pct',
+    # Derived (see derived_telemetry.py)
+    'distance_to_home', 'bearing_to_home',
+    'distance_to_waypoint', 'bearing_to_waypoint', 'eta_to_waypoint',
+    'climb_rate_smoothed', 'groundspeed_smoothed',
+    'battery_drain_rate', 'battery_time_remaining', 'distance_flown',
+)
+
+HEADER = struct.Struct('<4sHHII1024s')
+SEQ = struct.Struct('<I')
+
+def _slot_struct(field_count):
+    return struct.Struct('<IId' + 'd' * field_count)
+
+def _attach(name):
+    """Open an existing block without letting this process's exit unlink it"""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    shm = shared_memory.SharedMemory(name=name)
+    if os.name == 'posix':
+        # Windows has no resource tracker to opt out of
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, 'shared_memory')
+    return shm
+
+def _process_alive(pid):
+    if os.name != 'posix':
+        # Windows frees a block with its last handle, so one still here is in use
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+class TelemetryTableWriter:
+    """Owns the shared memory block and publishes telemetry into it"""
+
+    def __init__(self, name, slots=64, fields=FIELDS):
+        self.fields = tuple(fields)
+        self.slots = slots
+        self.slot = _slot_struct(len(self.fields))
+
+        names = ','.join(self.fields).encode('ascii')
+        if len(names) > 1024:
+            raise ValueError("Field names do not fit in the table header")
+
+        size = HEADER.size + self.slot.size * slots
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            existing = _attach(name)
+            try:
+                magic, version, _, _, owner, _ = HEADER.unpack_from(existing.buf, 0)
+            except struct.error:
+                magic = version = owner = None
+            existing.close()
+            if magic != MAGIC or version != VERSION:
+                raise FileExistsError(
+                    f"Shared memory '{name}' exists but is not a version {VERSION} telemetry table; "
+                    "remove it or choose another --shm name"
+                )
+            if _process_alive(owner):
+                # Another bridge is publishing here; unlinking it would leave
+                # attached readers on a block nobody updates
+                raise FileExistsError(
+                    f"Shared memory '{name}' is in use (owner pid {owner}); "
+                    "stop that bridge or choose another --shm name"
+                )
+            # Stale block left behind by a bridge that did not shut down cleanly
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+
+        self.shm.buf[:size] = bytes(size)
+        HEADER.pack_into(self.shm.buf, 0, MAGIC, VERSION, len(self.fields), slots, os.getpid(), names)
+        self.slot_index = {}  # sysid -> slot
+
+    def publish(self, sysid, telemetry, updated_at=None):
+        """Write the latest telemetry for one vehicle"""
+        index = self.slot_index.get(sysid)
+        if index is None:
+            if len(self.slot_index) >= self.slots:
+                return False
+            index = len(self.slot_index)
+            self.slot_index[sysid] = index
+
+        values = []
+        for field in self.fields:
+            value = telemetry.get(field)
+            values.append(math.nan if value is None else float(value))
+
+        offset = HEADER.size + index * self.slot.size
+        buf = self.shm.buf
+        seq = SEQ.unpack_from(buf, offset)[0]
+        SEQ.pack_into(buf, offset, (seq + 1) & 0xFFFFFFFF)
+        self.slot.pack_into(
+            buf, offset,
+            (seq + 1) & 0xFFFFFFFF,
+            sysid,
+            time.time() if updated_at is None else updated_at,
+            *values
+        )
+        SEQ.pack_into(buf, offset, (seq + 2) & 0xFFFFFFFF)
+        return True
+
+    def close(self):
+        """Release and remove the shared memory block"""
+        self.shm.close()
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+class TelemetryTableReader:
+    """Attaches to a table published by the bridge and reads consistent snapshots"""
+
+    def __init__(self, name):
+        # Readers must not unlink the writer's block when they exit
+        self.shm = _attach(name)
+
+        magic, version, field_count, slots, _, names = HEADER.unpack_from(self.shm.buf, 0)
+        if magic != MAGIC or version != VERSION:
+            self.shm.close()
+            raise ValueError(f"{name} is not a telemetry table (version {VERSION})")
+
+        self.fields = tuple(names.rstrip(b'\0').decode('ascii').split(','))[:field_count]
+        self.slots = slots
+        self.slot = _slot_struct(field_count)
+
+    def _read_slot(self, index, timeout=0.5):
+        offset = HEADER.size + index * self.slot.size
+        buf = self.shm.buf
+        deadline = None
+        delay = 0.0
+        while True:
+            before = SEQ.unpack_from(buf, offset)[0]
+            if not before & 1:
+                values = self.slot.unpack_from(buf, offset)
+                if SEQ.unpack_from(buf, offset)[0] == before:
+                    return values
+
+            # The writer is a Python thread and can be descheduled mid-write for
+            # a whole GIL switch interval; yield, then back off, on a time budget
+            now = time.monotonic()
+            if deadline is None:
+                deadline = now + timeout
+            elif now >= deadline:
+                raise TimeoutError("Telemetry slot kept changing while being read")
+            time.sleep(delay)
+            delay = min(delay * 2 or 0.0001, 0.005)
+
+    def _to_dict(self, values):
+        _, sysid, updated_at, *fields = values
+        telemetry = {
+            name: value
+            for name, value in zip(self.fields, fields)
+            if not math.isnan(value)
+        }
+        telemetry['updated_at'] = updated_at
+        return telemetry
+
+    def read(self, sysid):
+        """Latest telemetry for one vehicle, or None if it has not been published"""
+        for index in range(self.slots):
+            values = self._read_slot(index)
+            if values[0] == 0:
+                break  # Slots fill in order; the rest are empty
+            if values[1] == sysid:
+                return self._to_dict(values)
+        return None
+
+    def read_all(self):
+        """Latest telemetry for every published vehicle"""
+        vehicles = {}
+        for index in range(self.slots):
+            values = self._read_slot(index)
+            if values[0] == 0:
+                break
+            vehicles[values[1]] = self._to_dict(values)
+        return vehicles
+
+    def close(self):
+        """Detach from the table"""
+        self.shm.close()
+
+if __name__ == '__main__':
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description='Dump a shared-memory telemetry table')
+    parser.add_argument('name', help='Shared memory name passed to mavlink_bridge.py --shm')
+    args = parser.parse_args()
+
+    table = TelemetryTableReader(args.name)
+    print(json.dumps(table.read_all(), indent=2))
+    table.close()